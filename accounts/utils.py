@@ -12,6 +12,15 @@ def get_user_organizations(user):
         return Organization.objects.none()
 
 
+def get_user_organization_ids(user):
+    """Get the ids of all organizations the user belongs to."""
+    return list(
+        Membership.objects.filter(user_profile__user_id=user.id)
+        .values_list("organization_id", flat=True)
+        .distinct()
+    )
+
+
 def get_user_organization(user, org_uid):
     """Get a specific organization if user has access."""
     user_orgs = get_user_organizations(user)
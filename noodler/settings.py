@@ -103,6 +103,10 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": _db_name,
+        # Keep connections open between requests instead of reconnecting
+        # on every request (notably the high-volume trace ingest endpoint).
+        "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
@@ -160,6 +164,30 @@ REST_FRAMEWORK = {
 
 CELERY_BROKER_URL = os.environ.get("CELERY_BROKER_URL", "pyamqp://guest@localhost//")
 
+# Ingested RawTraces are stored pending and processed in batches by a
+# periodic sweeper; the beat scheduler runs embedded in the worker (-B).
+CELERY_BEAT_SCHEDULE = {
+    "process-pending-traces": {
+        "task": "traces.tasks.process_pending_traces",
+        "schedule": 5.0,
+        # Drop a run that could not start before the next one is due
+        "options": {"expires": 5.0},
+    },
+}
+
+
+# Trace ingestion
+
+# Maximum accepted size (in bytes) of an OTLP payload sent to the ingest API.
+# The ingest API reads the raw stream, so DATA_UPLOAD_MAX_MEMORY_SIZE (2.5 MB)
+# does not apply to it; this is its only limit.
+# An accepted payload is held in memory by the web process and then sent to
+# the broker base64-encoded inside a JSON message, about 4/3 of its size; keep
+# it well below the broker's maximum message size (128 MiB on RabbitMQ 3.x).
+TRACES_MAX_PAYLOAD_SIZE = int(
+    os.environ.get("TRACES_MAX_PAYLOAD_SIZE", 10 * 1024 * 1024)
+)
+
 
 # Authentication URLs
 
@@ -1,4 +1,4 @@
-from .utils import get_current_project, get_user_projects
+from .utils import get_request_current_project, get_request_user_projects
 
 
 def current_project(request):
@@ -11,9 +11,9 @@ def current_project(request):
     if not request.user.is_authenticated:
         return {}
 
-    current = get_current_project(request.user, request.session)
+    current = get_request_current_project(request)
     projects = (
-        get_user_projects(request.user)
+        get_request_user_projects(request)
         .select_related("organization")
         .order_by("organization__name", "name")
     )
@@ -2,8 +2,8 @@ from functools import wraps
 from django.contrib import messages
 from django.shortcuts import redirect
 from .utils import (
-    get_user_projects,
-    get_current_project,
+    get_request_user_projects,
+    get_request_current_project,
     set_current_project,
     get_or_auto_select_project,
 )
@@ -44,7 +44,7 @@ def require_project_access(
     def decorator(view_func):
         @wraps(view_func)
         def wrapper(request, *args, **kwargs):
-            user_projects = get_user_projects(request.user)
+            user_projects = get_request_user_projects(request)
             project = None
             project_uid = None
 
@@ -63,13 +63,13 @@ def require_project_access(
             # Auto-update: If we have a project from URL and auto_update is enabled,
             # update the current project in session
             if auto_update and project_uid and project:
-                current_project = get_current_project(request.user, request.session)
+                current_project = get_request_current_project(request)
                 if not current_project or current_project.uid != project_uid:
-                    set_current_project(request.session, project.id)
+                    set_current_project(request.session, project)
 
             # Handle session-based current_project requirement
             if require_current_project:
-                current_project = get_current_project(request.user, request.session)
+                current_project = get_request_current_project(request)
 
                 # No current project set
                 if not current_project:
@@ -111,7 +111,7 @@ def require_project_access(
 
             # If check_both is True but require_current_project is False, validate both match
             elif check_both and project_uid:
-                current_project = get_current_project(request.user, request.session)
+                current_project = get_request_current_project(request)
                 if current_project and project_uid != current_project.uid:
                     messages.error(
                         request,
@@ -235,6 +235,42 @@ class ProjectViewsTestCase(TestCase):
         session = self.client.session
         self.assertEqual(session.get("current_project_id"), self.project1.id)
 
+    def test_project_edit_refreshes_cached_current_project(self):
+        """Test that renaming the current project updates the cached name."""
+        self.client.login(username="user1", password="testpass123")
+        self.client.post(reverse("projects:switch", args=[self.project1.uid]))
+
+        self.client.post(
+            reverse("projects:edit", args=[self.project1.uid]),
+            {"name": "Renamed Project"},
+        )
+
+        response = self.client.get(reverse("traces:list"))
+        self.assertContains(response, "Renamed Project")
+
+    def test_cached_current_project_shows_rename_from_another_session(self):
+        """Test that a rename made elsewhere shows up without switching projects."""
+        self.client.login(username="user1", password="testpass123")
+        self.client.post(reverse("projects:switch", args=[self.project1.uid]))
+
+        Project.objects.filter(pk=self.project1.pk).update(name="Renamed Elsewhere")
+
+        response = self.client.get(reverse("traces:list"))
+        self.assertEqual(response.context["current_project"].name, "Renamed Elsewhere")
+
+    def test_cached_current_project_revalidates_access(self):
+        """Test that a cached current project is dropped once access is lost."""
+        self.client.login(username="user1", password="testpass123")
+        self.client.post(reverse("projects:switch", args=[self.project1.uid]))
+
+        self.membership1.delete()
+
+        response = self.client.get(reverse("traces:list"))
+        self.assertRedirects(response, reverse("projects:list"))
+        session = self.client.session
+        self.assertNotIn("current_project_id", session)
+        self.assertNotIn("current_project_meta", session)
+
 
 class ApiKeyViewsTestCase(TestCase):
     def setUp(self):
@@ -1,17 +1,33 @@
-from accounts.utils import get_user_organizations
+import uuid
+from accounts.utils import get_user_organization_ids
 from .models import Project
 
 
 def get_user_projects(user):
     """Get all projects the user has access to (via their organizations)."""
-    orgs = get_user_organizations(user)
-    return Project.objects.filter(organization__in=orgs)
+    return Project.objects.filter(organization_id__in=get_user_organization_ids(user))
+
+
+def get_request_user_projects(request):
+    """
+    Get the projects request.user has access to, memoized on the request.
+
+    The view decorator and the context processor both need this queryset
+    while handling the same request; the organization lookup runs once.
+    """
+    if not hasattr(request, "_user_projects_cache"):
+        request._user_projects_cache = get_user_projects(request.user)
+    return request._user_projects_cache
 
 
 def get_current_project(user, session):
     """
     Get current project from session and validate user has access.
 
+    The project's uid is cached in the session by set_current_project, so
+    on a cache hit a single query re-checks access and fetches the name and
+    organization; the remaining fields load lazily if used.
+
     Args:
         user: The user object
         session: Django session object
@@ -23,24 +39,81 @@ def get_current_project(user, session):
     if not current_project_id:
         return None
 
-    user_projects = get_user_projects(user)
-    try:
-        return user_projects.get(id=current_project_id)
-    except Project.DoesNotExist:
-        # Current project is no longer accessible, clear it from session
-        del session["current_project_id"]
-        return None
+    meta = session.get("current_project_meta")
+    if meta and meta["id"] == current_project_id:
+        row = (
+            Project.objects.filter(
+                id=current_project_id,
+                organization__membership__user_profile__user_id=user.id,
+            )
+            .values_list("name", "organization_id")
+            .first()
+        )
+        if row is not None:
+            name, organization_id = row
+            return Project.from_db(
+                Project.objects.db,
+                ["id", "uid", "name", "organization_id"],
+                [meta["id"], uuid.UUID(meta["uid"]), name, organization_id],
+            )
+    else:
+        try:
+            project = get_user_projects(user).get(id=current_project_id)
+            set_current_project(session, project)
+            return project
+        except Project.DoesNotExist:
+            pass
+
+    # Current project is no longer accessible, clear it from session
+    clear_current_project(session)
+    return None
+
+
+def get_request_current_project(request):
+    """
+    Get the current project for request.user, memoized on the request.
+
+    The view decorator and the context processor both need it while handling
+    the same request. The memo is keyed by the session's current_project_id,
+    so switching or clearing the project mid-request is picked up.
+    """
+    cached = getattr(request, "_current_project_cache", None)
+    if cached is not None and cached[0] == request.session.get("current_project_id"):
+        return cached[1]
 
+    project = get_current_project(request.user, request.session)
+    # get_current_project may have cleared an inaccessible project
+    request._current_project_cache = (
+        request.session.get("current_project_id"),
+        project,
+    )
+    return project
 
-def set_current_project(session, project_id):
+
+def set_current_project(session, project):
     """
     Set current project in session.
 
     Args:
         session: Django session object
-        project_id: ID of the project to set as current
+        project: The Project to set as current
+    """
+    session["current_project_id"] = project.id
+    session["current_project_meta"] = {
+        "id": project.id,
+        "uid": str(project.uid),
+    }
+
+
+def clear_current_project(session):
+    """
+    Remove the current project from session.
+
+    Args:
+        session: Django session object
     """
-    session["current_project_id"] = project_id
+    session.pop("current_project_id", None)
+    session.pop("current_project_meta", None)
 
 
 def get_or_auto_select_project(user, session):
@@ -67,7 +140,7 @@ def get_or_auto_select_project(user, session):
     first_project = user_projects.first()
 
     if first_project:
-        set_current_project(session, first_project.id)
+        set_current_project(session, first_project)
         return first_project
 
     # User has no projects
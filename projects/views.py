@@ -6,9 +6,14 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.views.decorators.http import require_http_methods, require_POST
 from django.utils.http import url_has_allowed_host_and_scheme
 from accounts.models import Organization
+from accounts.utils import get_user_organizations
 from .models import Project, ApiKey
 from .decorators import require_project_access
-from .utils import get_user_organizations, get_user_projects
+from .utils import (
+    clear_current_project,
+    get_request_user_projects,
+    set_current_project,
+)
 
 
 @login_required
@@ -17,8 +22,9 @@ def project_list(request):
     from collections import OrderedDict
 
     projects = (
-        get_user_projects(request.user)
+        get_request_user_projects(request)
         .select_related("organization")
+        .only("uid", "name", "organization__name", "organization__is_default")
         .order_by("organization__name", "name")
     )
 
@@ -129,7 +135,7 @@ def project_delete(request, project_uid):
     original_current_project_id = getattr(request, "original_current_project_id", None)
     if original_current_project_id == deleted_project_id:
         # The deleted project was the original current project, clear it
-        del request.session["current_project_id"]
+        clear_current_project(request.session)
     elif (
         original_current_project_id
         and original_current_project_id != deleted_project_id
@@ -224,7 +230,7 @@ def api_key_revoke(request, project_uid, key_uid):
 @require_POST
 def project_switch(request, project_uid):
     """Switch the current project (stored in session)."""
-    request.session["current_project_id"] = request.current_project.id
+    set_current_project(request.session, request.current_project)
 
     # Support redirect to a different page via 'next' parameter
     # Validate the URL to prevent open redirect vulnerabilities
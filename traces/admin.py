@@ -1,6 +1,16 @@
 from django.contrib import admin
 from .models import RawTrace, Trace, Span
 
-admin.site.register(RawTrace)
+
+@admin.register(RawTrace)
+class RawTraceAdmin(admin.ModelAdmin):
+    list_display = ["id", "project", "status", "received_at"]
+    list_select_related = ["project"]
+
+    def get_queryset(self, request):
+        # Payload blobs are only loaded when a single RawTrace is opened
+        return super().get_queryset(request).lite()
+
+
 admin.site.register(Trace)
 admin.site.register(Span)
@@ -1,10 +1,46 @@
+import logging
+from io import BytesIO
+
+from django.conf import settings
 from django.utils import timezone
+from kombu.exceptions import OperationalError as BrokerError
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from projects.auth import APIKeyAuthentication
-from traces.models import RawTrace
-from traces.tasks import process_trace
+from traces.tasks import ingest_trace
+
+logger = logging.getLogger(__name__)
+
+# Size of each read from the request stream while buffering the payload.
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class PayloadTooLarge(Exception):
+    pass
+
+
+def read_payload(request):
+    """
+    Read the request body from the underlying stream in fixed-size chunks.
+
+    Unlike `request.body`, this is not capped by DATA_UPLOAD_MAX_MEMORY_SIZE
+    and stops reading as soon as TRACES_MAX_PAYLOAD_SIZE is exceeded, so an
+    oversized upload is rejected without being buffered in full. An accepted
+    payload is still held in memory whole, up to that limit.
+    """
+    stream = request.stream
+    if stream is None:
+        return b""
+
+    max_size = settings.TRACES_MAX_PAYLOAD_SIZE
+    buffer = BytesIO()
+    while chunk := stream.read(READ_CHUNK_SIZE):
+        buffer.write(chunk)
+        if buffer.tell() > max_size:
+            raise PayloadTooLarge(f"Payload exceeds {max_size} bytes")
+
+    return buffer.getvalue()
 
 
 class TraceListView(APIView):
@@ -13,17 +49,21 @@ class TraceListView(APIView):
     def post(self, request):
         try:
             if request.content_type == "application/x-protobuf":
-                body_bytes = request.body
+                body_bytes = read_payload(request)
             else:
                 return Response({"error": "Unsupported content type"}, status=400)
 
-            raw_trace = RawTrace.objects.create(
-                project=request.auth.project,
-                received_at=timezone.now(),
-                payload_protobuf=body_bytes,
-            )
-            process_trace.delay(raw_trace.id)
+            # Persisting and processing happen on the worker; the request
+            # only has to hand the payload to the broker.
+            ingest_trace.delay(request.auth.project.id, timezone.now(), body_bytes)
+        except PayloadTooLarge as e:
+            return Response({"error": str(e)}, status=413)
+        except BrokerError:
+            # The broker holds the only copy of the payload; 503 tells OTLP
+            # exporters to retry, whereas a 400 would drop the trace.
+            logger.exception("Could not queue trace payload")
+            return Response({"error": "Service unavailable"}, status=503)
         except Exception as e:
             return Response({"error": str(e)}, status=400)
 
-        return Response({}, status=201)
+        return Response({}, status=202)
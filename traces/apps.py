@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class TracesConfig(AppConfig):
     name = "traces"
+
+    def ready(self):
+        from . import checks  # noqa: F401
@@ -0,0 +1,21 @@
+from django.core.checks import Warning, register
+from google.protobuf.internal import api_implementation
+
+
+@register()
+def check_protobuf_implementation(app_configs, **kwargs):
+    """Warn when protobuf runs on the slow pure-Python backend."""
+    if api_implementation.Type() in ("upb", "cpp"):
+        return []
+
+    return [
+        Warning(
+            "protobuf is using the pure-Python implementation; parsing OTLP "
+            "payloads will be much slower.",
+            hint=(
+                "Install a protobuf wheel with the native upb extension and "
+                "unset PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION=python."
+            ),
+            id="traces.W001",
+        )
+    ]
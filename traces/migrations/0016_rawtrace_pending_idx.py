@@ -0,0 +1,21 @@
+# Generated by Django 6.1.2 on 2026-10-15 08:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("projects", "0008_alter_apikey_uid_alter_project_uid"),
+        ("traces", "0015_rename_span_id_to_otel_span_id"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="rawtrace",
+            index=models.Index(
+                condition=models.Q(("status", "pending")),
+                fields=["status", "received_at"],
+                name="raw_trace_pending_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 6.1.2 on 2026-10-15 08:10
+
+from django.db import migrations, models
+
+STATUS_CODES = {
+    "pending": "0",
+    "processed": "1",
+    "error": "2",
+}
+
+
+def encode_status(apps, schema_editor):
+    RawTrace = apps.get_model("traces", "RawTrace")
+    for name, code in STATUS_CODES.items():
+        RawTrace.objects.filter(status=name).update(status=code)
+
+
+def decode_status(apps, schema_editor):
+    RawTrace = apps.get_model("traces", "RawTrace")
+    for name, code in STATUS_CODES.items():
+        RawTrace.objects.filter(status=code).update(status=name)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("traces", "0016_rawtrace_pending_idx"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="rawtrace",
+            name="raw_trace_pending_idx",
+        ),
+        migrations.RunPython(encode_status, decode_status),
+        migrations.AlterField(
+            model_name="rawtrace",
+            name="status",
+            field=models.PositiveSmallIntegerField(
+                choices=[(0, "Pending"), (1, "Processed"), (2, "Error")], default=0
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="rawtrace",
+            index=models.Index(
+                condition=models.Q(("status", 0)),
+                fields=["status", "received_at"],
+                name="raw_trace_pending_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.1.2 on 2026-10-15 08:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("traces", "0017_alter_rawtrace_status"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="span",
+            name="trace",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="spans",
+                to="traces.trace",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="span",
+            index=models.Index(
+                fields=["trace", "start_time"], name="span_trace_start_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 6.1.2 on 2026-10-15 08:18
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_traces(apps, schema_editor):
+    """Fold traces sharing (project, otel_trace_id) into the oldest one."""
+    Trace = apps.get_model("traces", "Trace")
+    Span = apps.get_model("traces", "Span")
+    Annotation = apps.get_model("datasets", "Annotation")
+    DatasetTrace = apps.get_model("datasets", "Dataset").traces.through
+
+    duplicates = (
+        Trace.objects.values("project_id", "otel_trace_id")
+        .annotate(count=Count("id"), keep_id=Min("id"))
+        .filter(count__gt=1)
+    )
+    for duplicate in duplicates:
+        keep_id = duplicate["keep_id"]
+        extra_traces = Trace.objects.filter(
+            project_id=duplicate["project_id"],
+            otel_trace_id=duplicate["otel_trace_id"],
+        ).exclude(id=keep_id)
+        Span.objects.filter(trace__in=extra_traces).update(trace_id=keep_id)
+
+        # Move annotations and dataset memberships over as well, so deleting
+        # the duplicates does not cascade to them
+        for extra_id in extra_traces.values_list("id", flat=True):
+            kept_dataset_ids = DatasetTrace.objects.filter(trace_id=keep_id).values(
+                "dataset_id"
+            )
+            DatasetTrace.objects.filter(trace_id=extra_id).exclude(
+                dataset_id__in=kept_dataset_ids
+            ).update(trace_id=keep_id)
+
+            for annotation in Annotation.objects.filter(trace_id=extra_id):
+                kept = Annotation.objects.filter(
+                    trace_id=keep_id, dataset_id=annotation.dataset_id
+                ).first()
+                if kept is None:
+                    annotation.trace_id = keep_id
+                    annotation.save(update_fields=["trace"])
+                    continue
+
+                # (trace, dataset) is unique: fold this annotation into the
+                # kept one instead of losing its notes and failure modes
+                if annotation.notes and annotation.notes not in kept.notes:
+                    kept.notes = "\n\n".join(
+                        filter(None, [kept.notes, annotation.notes])
+                    )
+                    kept.save(update_fields=["notes"])
+                kept.failure_modes.add(*annotation.failure_modes.all())
+
+        extra_traces.delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("datasets", "0004_alter_annotation_notes"),
+        ("projects", "0008_alter_apikey_uid_alter_project_uid"),
+        ("traces", "0018_span_trace_related_name_and_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_traces, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="trace",
+            constraint=models.UniqueConstraint(
+                fields=("project", "otel_trace_id"),
+                name="trace_project_otel_trace_id_uniq",
+            ),
+        ),
+    ]
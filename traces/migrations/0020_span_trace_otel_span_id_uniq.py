@@ -0,0 +1,36 @@
+# Generated by Django 6.1.2 on 2026-10-15 08:23
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def remove_duplicate_spans(apps, schema_editor):
+    """Keep only the most recently stored copy of each (trace, otel_span_id)."""
+    Span = apps.get_model("traces", "Span")
+
+    duplicates = (
+        Span.objects.values("trace_id", "otel_span_id")
+        .annotate(count=Count("id"), keep_id=Max("id"))
+        .filter(count__gt=1)
+    )
+    for duplicate in duplicates:
+        Span.objects.filter(
+            trace_id=duplicate["trace_id"],
+            otel_span_id=duplicate["otel_span_id"],
+        ).exclude(id=duplicate["keep_id"]).delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("traces", "0019_trace_project_otel_trace_id_uniq"),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_spans, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="span",
+            constraint=models.UniqueConstraint(
+                fields=("trace", "otel_span_id"), name="span_trace_otel_span_id_uniq"
+            ),
+        ),
+    ]
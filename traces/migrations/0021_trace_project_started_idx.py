@@ -0,0 +1,19 @@
+# Generated by Django 6.1.2 on 2026-10-15 08:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("projects", "0008_alter_apikey_uid_alter_project_uid"),
+        ("traces", "0020_span_trace_otel_span_id_uniq"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="trace",
+            index=models.Index(
+                fields=["project", "-started_at"], name="trace_project_started_idx"
+            ),
+        ),
+    ]
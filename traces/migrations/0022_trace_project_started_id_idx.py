@@ -0,0 +1,24 @@
+# Generated by Django 6.1.2 on 2026-10-15 10:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("projects", "0008_alter_apikey_uid_alter_project_uid"),
+        ("traces", "0021_trace_project_started_idx"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="trace",
+            name="trace_project_started_idx",
+        ),
+        migrations.AddIndex(
+            model_name="trace",
+            index=models.Index(
+                fields=["project", "-started_at", "-id"],
+                name="trace_project_started_idx",
+            ),
+        ),
+    ]
@@ -1,38 +1,79 @@
+import logging
 import uuid
-from django.db import models, transaction
-from django.db.models import JSONField, BinaryField
-from google.protobuf.json_format import MessageToDict
+from django.db import OperationalError, models, transaction
+from django.db.models import JSONField, BinaryField, Count, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
 from opentelemetry.proto.trace.v1.trace_pb2 import TracesData
 
 from projects.models import Project
 from traces.utils import extract_trace_data
 
+logger = logging.getLogger(__name__)
+
+
+class RawTraceQuerySet(models.QuerySet):
+    def lite(self):
+        """Skip the (potentially multi-MB) payload columns, e.g. for listings."""
+        return self.defer("payload_protobuf", "payload_json")
+
+    def for_processing(self):
+        """Load only the columns needed by RawTrace.process()."""
+        return self.only("status", "project", "payload_protobuf", "received_at")
+
 
 class RawTrace(models.Model):
+    STATUS_PENDING = 0
+    STATUS_PROCESSED = 1
+    STATUS_ERROR = 2
     STATUS_CHOICES = [
-        ("pending", "Pending"),
-        ("processed", "Processed"),
-        ("error", "Error"),
+        (STATUS_PENDING, "Pending"),
+        (STATUS_PROCESSED, "Processed"),
+        (STATUS_ERROR, "Error"),
     ]
-    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    status = models.PositiveSmallIntegerField(
+        choices=STATUS_CHOICES, default=STATUS_PENDING
+    )
     project = models.ForeignKey(Project, on_delete=models.CASCADE)
     payload_json = JSONField(blank=True, null=True)
     payload_protobuf = BinaryField(blank=True, null=True)
     received_at = models.DateTimeField()
-    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+
+    objects = RawTraceQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Partial index for the pending-work scan; stays small as
+            # processed rows accumulate.
+            models.Index(
+                fields=["status", "received_at"],
+                name="raw_trace_pending_idx",
+                condition=Q(status=0),  # STATUS_PENDING
+            ),
+        ]
 
     def __str__(self):
         return f"RawTrace for {self.project.name}"
 
-    def convert_to_dict(self):
-        # Parse the protobuf message
-        traces_data = TracesData()
-        traces_data.ParseFromString(self.payload_protobuf)
+    def save(self, *args, **kwargs):
+        # Drop the memoized parse result if the payload may have changed
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "payload_protobuf" in update_fields:
+            self.__dict__.pop("_cached_traces_data", None)
+        super().save(*args, **kwargs)
+
+    def parse_protobuf(self):
+        """
+        Parse the protobuf payload into a TracesData message.
 
-        # Convert protobuf message to dictionary (unmarshalling)
-        traces_dict = MessageToDict(traces_data, preserving_proto_field_name=True)
+        The result is memoized on the instance, since parsing dominates the
+        cost of processing a RawTrace.
+        """
+        if "_cached_traces_data" not in self.__dict__:
+            traces_data = TracesData()
+            traces_data.ParseFromString(self.payload_protobuf)
+            self._cached_traces_data = traces_data
 
-        return traces_dict
+        return self._cached_traces_data
 
     @transaction.atomic
     def process(self):
@@ -42,14 +83,14 @@ class RawTrace(models.Model):
         Returns the created/updated Trace object, or None on error.
         """
         try:
-            # Step 1: Convert protobuf to dict
-            traces_dict = self.convert_to_dict()
+            # Step 1: Parse protobuf
+            traces_data = self.parse_protobuf()
 
             # Step 2: Extract trace data
-            extracted_data = extract_trace_data(traces_dict)
+            extracted_data = extract_trace_data(traces_data)
 
             if not extracted_data:
-                self.status = "error"
+                self.status = self.STATUS_ERROR
                 self.save(update_fields=["status"])
                 return None
 
@@ -58,26 +99,135 @@ class RawTrace(models.Model):
 
             if trace:
                 # Step 4: Update status to processed
-                self.status = "processed"
+                self.status = self.STATUS_PROCESSED
                 self.save(update_fields=["status"])
                 return trace
             else:
-                self.status = "error"
+                self.status = self.STATUS_ERROR
                 self.save(update_fields=["status"])
                 return None
 
         except Exception:
             # On any error, mark as error and re-raise
-            self.status = "error"
+            self.status = self.STATUS_ERROR
             self.save(update_fields=["status"])
             raise
 
+    @classmethod
+    def process_batch(cls, raw_trace_ids):
+        """
+        Process several pending RawTraces at once.
+
+        Spans from every trace in the batch are inserted with a single
+        bulk_create and statuses are written with one query per outcome, so
+        the number of roundtrips does not grow with the batch size. A payload
+        that fails to process is marked as error without aborting the batch.
+
+        Returns the list of created/updated Trace objects.
+        """
+        with transaction.atomic():
+            # Rows locked by a concurrent batch are skipped on backends with
+            # row locks. SQLite ignores select_for_update; there an overlapping
+            # run may re-process a row, which the upserts make harmless.
+            raw_traces = list(
+                cls.objects.for_processing()
+                .select_for_update(skip_locked=True)
+                .filter(id__in=raw_trace_ids, status=cls.STATUS_PENDING)
+            )
+            try:
+                with transaction.atomic():
+                    traces, processed_ids, error_ids = cls._write_batch(raw_traces)
+            except Exception:
+                # A span write failed; redo the batch one RawTrace at a time
+                # so only the offending payloads are marked as error
+                logger.exception(
+                    "Span upsert failed for RawTraces %s, retrying one by one",
+                    [raw_trace.id for raw_trace in raw_traces],
+                )
+                traces, processed_ids, error_ids = cls._write_batch(
+                    raw_traces, upsert_each=True
+                )
+
+            if processed_ids:
+                cls.objects.filter(id__in=processed_ids).update(
+                    status=cls.STATUS_PROCESSED
+                )
+            if error_ids:
+                cls.objects.filter(id__in=error_ids).update(status=cls.STATUS_ERROR)
+
+        return traces
+
+    @classmethod
+    def _write_batch(cls, raw_traces, upsert_each=False):
+        """
+        Create the Traces and Spans for `raw_traces`.
+
+        Each RawTrace is handled in its own savepoint. Spans are upserted
+        together at the end, or, with `upsert_each`, inside that savepoint so
+        a failing write only affects its own RawTrace. A RawTrace that hits
+        an OperationalError is in neither list and stays pending.
+
+        Returns a (traces, processed_ids, error_ids) tuple.
+        """
+        traces = []
+        span_objects = []
+        processed_ids = []
+        error_ids = []
+
+        for raw_trace in raw_traces:
+            try:
+                with transaction.atomic():
+                    extracted_data = extract_trace_data(raw_trace.parse_protobuf())
+                    result = raw_trace._prepare_trace_and_spans(extracted_data)
+                    if result is not None and upsert_each and result[1]:
+                        Span.objects.upsert(result[1])
+            except OperationalError:
+                # Likely transient (e.g. a locked database); leave the
+                # RawTrace pending so a later run picks it up again
+                logger.exception("Could not process RawTrace %s", raw_trace.id)
+                continue
+            except Exception:
+                logger.exception("Failed to process RawTrace %s", raw_trace.id)
+                result = None
+
+            if result is None:
+                error_ids.append(raw_trace.id)
+                continue
+
+            trace, trace_span_objects = result
+            traces.append(trace)
+            if not upsert_each:
+                span_objects.extend(trace_span_objects)
+            processed_ids.append(raw_trace.id)
+
+        if span_objects:
+            Span.objects.upsert(span_objects, batch_size=1000)
+
+        return traces, processed_ids, error_ids
+
     def _create_trace_and_spans(self, extracted_data):
         """
         Create Trace and Span objects from extracted data.
 
         Returns the created/updated Trace object.
         """
+        result = self._prepare_trace_and_spans(extracted_data)
+        if result is None:
+            return None
+
+        trace, span_objects = result
+        if span_objects:
+            Span.objects.upsert(span_objects)
+
+        return trace
+
+    def _prepare_trace_and_spans(self, extracted_data):
+        """
+        Create or update the Trace and build its (unsaved) Span objects.
+
+        Returns a (trace, span_objects) tuple, or None if there is nothing
+        to store.
+        """
         if not extracted_data:
             return None
 
@@ -96,12 +246,19 @@ class RawTrace(models.Model):
         if service_name:
             service_name = service_name[:50]
 
-        # Calculate trace timestamps from spans
-        start_times = [s["start_time"] for s in spans_data if s.get("start_time")]
-        end_times = [s["end_time"] for s in spans_data if s.get("end_time")]
+        # Build Span objects and track the trace's time bounds in one pass
+        started_at = None
+        ended_at = None
+        span_objects = []
+        for span_data in spans_data:
+            start_time = span_data["start_time"]
+            end_time = span_data["end_time"]
+            if start_time and (started_at is None or start_time < started_at):
+                started_at = start_time
+            if end_time and (ended_at is None or end_time > ended_at):
+                ended_at = end_time
 
-        started_at = min(start_times) if start_times else None
-        ended_at = max(end_times) if end_times else None
+            span_objects.append(Span(**span_data))
 
         # If no valid timestamps, use received_at as fallback
         if not started_at:
@@ -112,7 +269,7 @@ class RawTrace(models.Model):
         # Create or get Trace
         trace, created = Trace.objects.get_or_create(
             otel_trace_id=trace_id,
-            project=self.project,
+            project_id=self.project_id,
             defaults={
                 "started_at": started_at,
                 "ended_at": ended_at,
@@ -121,45 +278,54 @@ class RawTrace(models.Model):
             },
         )
 
-        # Update trace if it already existed (in case timestamps changed)
+        # Update trace if it already existed, writing only what changed
         if not created:
-            trace.started_at = started_at
-            trace.ended_at = ended_at
+            new_values = {
+                "started_at": started_at,
+                "ended_at": ended_at,
+                "attributes": resource_attributes,
+            }
             if service_name:
-                trace.service_name = service_name
-            trace.attributes = resource_attributes
-            trace.save()
+                new_values["service_name"] = service_name
 
-        # Prepare Span objects for bulk_create
-        span_objects = []
-        for span_data in spans_data:
-            span = Span(
-                trace=trace,
-                otel_span_id=span_data.get("span_id", ""),
-                name=span_data.get("name", ""),
-                start_time=span_data.get("start_time") or started_at,
-                end_time=span_data.get("end_time"),
-                provider_name=span_data.get("provider_name"),
-                operation_name=span_data.get("operation_name"),
-                request_model=span_data.get("request_model"),
-                max_tokens=span_data.get("max_tokens"),
-                top_p=span_data.get("top_p"),
-                response_id=span_data.get("response_id"),
-                response_model=span_data.get("response_model"),
-                output_tokens=span_data.get("output_tokens"),
-                input_tokens=span_data.get("input_tokens"),
-                finished_reasons=span_data.get("finished_reasons"),
-                system_instructions=span_data.get("system_instructions"),
-                input_messages=span_data.get("input_messages"),
-                output_messages=span_data.get("output_messages"),
-            )
-            span_objects.append(span)
+            changed_fields = []
+            for field, value in new_values.items():
+                if getattr(trace, field) != value:
+                    setattr(trace, field, value)
+                    changed_fields.append(field)
+            if changed_fields:
+                trace.save(update_fields=changed_fields)
 
-        # Bulk create spans
-        if span_objects:
-            Span.objects.bulk_create(span_objects, ignore_conflicts=True)
+        # Attach the spans now that the Trace exists
+        for span in span_objects:
+            span.trace = trace
+            if not span.start_time:
+                span.start_time = started_at
 
-        return trace
+        return trace, span_objects
+
+
+class TraceQuerySet(models.QuerySet):
+    def with_span_summary(self):
+        """
+        Annotate each trace with its span count and token totals.
+
+        Correlated subqueries rather than a join + GROUP BY: only the traces
+        actually fetched (e.g. one page) are summarized, and count() on the
+        queryset drops them and stays a plain COUNT on traces_trace.
+        """
+        spans = Span.objects.filter(trace=OuterRef("pk")).order_by().values("trace")
+
+        def summary(aggregate):
+            return Coalesce(
+                Subquery(spans.annotate(value=aggregate).values("value")), 0
+            )
+
+        return self.annotate(
+            span_count=summary(Count("pk")),
+            total_input_tokens=summary(Sum("input_tokens")),
+            total_output_tokens=summary(Sum("output_tokens")),
+        )
 
 
 class Trace(models.Model):
@@ -173,16 +339,76 @@ class Trace(models.Model):
     service_name = models.CharField(max_length=50, null=True, blank=True)
     attributes = JSONField()
 
+    objects = TraceQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            # Backs the get_or_create lookup during ingestion and makes it
+            # race-safe: a concurrent insert fails and falls back to a get.
+            models.UniqueConstraint(
+                fields=["project", "otel_trace_id"],
+                name="trace_project_otel_trace_id_uniq",
+            ),
+        ]
+        indexes = [
+            # Trace list shows a project's traces, newest first; id breaks
+            # ties so pagination is stable
+            models.Index(
+                fields=["project", "-started_at", "-id"],
+                name="trace_project_started_idx",
+            ),
+        ]
+
     def __str__(self):
         return self.otel_trace_id
 
 
+class SpanQuerySet(models.QuerySet):
+    # Columns refreshed when an already stored span is ingested again
+    UPSERT_UPDATE_FIELDS = [
+        "name",
+        "start_time",
+        "end_time",
+        "provider_name",
+        "operation_name",
+        "request_model",
+        "max_tokens",
+        "top_p",
+        "response_id",
+        "response_model",
+        "output_tokens",
+        "input_tokens",
+        "finished_reasons",
+        "system_instructions",
+        "input_messages",
+        "output_messages",
+    ]
+
+    def upsert(self, span_objects, batch_size=None):
+        """
+        Insert spans, updating the stored row when (trace, otel_span_id)
+        already exists, in a single INSERT ... ON CONFLICT DO UPDATE.
+        """
+        # A span sent twice in one batch keeps its latest version; the
+        # database rejects updating the same row twice in one statement.
+        unique_spans = {
+            (span.trace_id, span.otel_span_id): span for span in span_objects
+        }
+        return self.bulk_create(
+            list(unique_spans.values()),
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=["trace", "otel_span_id"],
+            update_fields=self.UPSERT_UPDATE_FIELDS,
+        )
+
+
 class Span(models.Model):
     uid = models.UUIDField(
         default=uuid.uuid4, editable=False, unique=True, db_index=True
     )
     name = models.CharField(max_length=50)
-    trace = models.ForeignKey(Trace, on_delete=models.CASCADE)
+    trace = models.ForeignKey(Trace, on_delete=models.CASCADE, related_name="spans")
     otel_span_id = models.CharField(max_length=16)
     start_time = models.DateTimeField()
     end_time = models.DateTimeField(null=True, blank=True)
@@ -204,5 +430,18 @@ class Span(models.Model):
     input_messages = models.JSONField(null=True, blank=True)
     output_messages = models.JSONField(null=True, blank=True)
 
+    objects = SpanQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["trace", "otel_span_id"], name="span_trace_otel_span_id_uniq"
+            ),
+        ]
+        indexes = [
+            # Trace detail lists a trace's spans ordered by start_time
+            models.Index(fields=["trace", "start_time"], name="span_trace_start_idx"),
+        ]
+
     def __str__(self):
         return self.name
@@ -2,9 +2,53 @@ from celery import shared_task
 
 from traces.models import RawTrace
 
+# Number of RawTraces processed together by a single batch.
+PROCESS_BATCH_SIZE = 100
+
+# Upper bound on the RawTraces picked up by one run of the sweeper.
+MAX_PENDING_PER_RUN = 50 * PROCESS_BATCH_SIZE
+
 
 @shared_task
 def process_trace(raw_trace_id):
-    raw_trace = RawTrace.objects.get(id=raw_trace_id)
+    raw_trace = RawTrace.objects.for_processing().get(id=raw_trace_id)
     trace = raw_trace.process()
     return trace
+
+
+@shared_task(acks_late=True, reject_on_worker_lost=True)
+def ingest_trace(project_id, received_at, payload_protobuf):
+    """
+    Store a raw OTLP payload received by the ingest API.
+
+    The RawTrace is left pending and picked up by `process_pending_traces`.
+    The message is acknowledged only once the RawTrace is stored, so a
+    worker lost mid-task gets it redelivered; a duplicate RawTrace is
+    harmless since traces and spans are upserted.
+    """
+    raw_trace = RawTrace.objects.create(
+        project_id=project_id,
+        received_at=received_at,
+        payload_protobuf=payload_protobuf,
+    )
+    return raw_trace.id
+
+
+@shared_task
+def process_pending_traces():
+    """
+    Process pending RawTraces in batches of PROCESS_BATCH_SIZE, oldest first.
+
+    Runs periodically (see CELERY_BEAT_SCHEDULE).
+    """
+    pending_ids = list(
+        RawTrace.objects.filter(status=RawTrace.STATUS_PENDING)
+        .order_by("received_at")
+        .values_list("id", flat=True)[:MAX_PENDING_PER_RUN]
+    )
+
+    processed = 0
+    for start in range(0, len(pending_ids), PROCESS_BATCH_SIZE):
+        batch_ids = pending_ids[start : start + PROCESS_BATCH_SIZE]
+        processed += len(RawTrace.process_batch(batch_ids))
+    return processed
@@ -0,0 +1,8 @@
+from django import template
+
+from traces.utils import format_timedelta
+
+register = template.Library()
+
+# Renders a timedelta (e.g. an annotated duration) as a human-readable string
+register.filter("format_timedelta", format_timedelta)
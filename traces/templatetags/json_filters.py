@@ -0,0 +1,18 @@
+import json
+
+import orjson
+from django import template
+
+register = template.Library()
+
+
+@register.filter
+def prettyjson(value):
+    """Pretty-print a JSON field value; serialized only when rendered."""
+    if not value:
+        return ""
+    try:
+        return orjson.dumps(value, option=orjson.OPT_INDENT_2).decode()
+    except TypeError:
+        # orjson rejects some values json accepts, e.g. integers over 64 bits
+        return json.dumps(value, indent=2)
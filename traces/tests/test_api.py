@@ -0,0 +1,72 @@
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from kombu.exceptions import OperationalError
+from accounts.models import Organization
+from projects.models import Project, ApiKey
+from traces.tests.test_models import build_payload
+
+
+@patch("traces.api.views.ingest_trace.delay")
+class TraceIngestApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.org = Organization.objects.create(name="Test Org")
+        cls.project = Project.objects.create(name="Test Project", organization=cls.org)
+        ApiKey.objects.create(
+            name="Test Key", project=cls.project, create_dummy_key=True
+        )
+        cls.url = reverse("trace-list")
+
+    def _post(self, payload, content_type="application/x-protobuf"):
+        return self.client.post(
+            self.url,
+            data=payload,
+            content_type=content_type,
+            HTTP_AUTHORIZATION="Bearer dummy-key",
+        )
+
+    def test_ingest_queues_payload(self, mock_delay):
+        """Test that a protobuf payload is handed to ingest_trace with a 202."""
+        payload = build_payload()
+
+        response = self._post(payload)
+
+        self.assertEqual(response.status_code, 202)
+        mock_delay.assert_called_once()
+        project_id, _received_at, body = mock_delay.call_args.args
+        self.assertEqual(project_id, self.project.id)
+        self.assertEqual(body, payload)
+
+    @override_settings(TRACES_MAX_PAYLOAD_SIZE=100)
+    def test_ingest_rejects_oversized_payload(self, mock_delay):
+        """Test that a payload over TRACES_MAX_PAYLOAD_SIZE gets a 413."""
+        response = self._post(b"x" * 101)
+
+        self.assertEqual(response.status_code, 413)
+        mock_delay.assert_not_called()
+
+    @override_settings(TRACES_MAX_PAYLOAD_SIZE=100)
+    def test_ingest_accepts_payload_at_limit(self, mock_delay):
+        """Test that a payload of exactly TRACES_MAX_PAYLOAD_SIZE is accepted."""
+        response = self._post(b"x" * 100)
+
+        self.assertEqual(response.status_code, 202)
+        mock_delay.assert_called_once()
+
+    def test_ingest_rejects_unsupported_content_type(self, mock_delay):
+        """Test that non-protobuf payloads are rejected."""
+        response = self._post(b"{}", content_type="application/json")
+
+        self.assertEqual(response.status_code, 400)
+        mock_delay.assert_not_called()
+
+    def test_ingest_returns_503_when_broker_is_unavailable(self, mock_delay):
+        """Test that a failed publish asks the client to retry."""
+        mock_delay.side_effect = OperationalError("connection refused")
+
+        with self.assertLogs("traces.api.views", "ERROR"):
+            response = self._post(build_payload())
+
+        self.assertEqual(response.status_code, 503)
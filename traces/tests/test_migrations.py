@@ -0,0 +1,94 @@
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+
+class MergeDuplicateTracesMigrationTests(TransactionTestCase):
+    migrate_from = ("traces", "0018_span_trace_related_name_and_index")
+    migrate_to = ("traces", "0019_trace_project_otel_trace_id_uniq")
+
+    def _migrate(self, node):
+        """Migrate traces to `node`, with every other app fully migrated."""
+        executor = MigrationExecutor(connection)
+        targets = [
+            leaf for leaf in executor.loader.graph.leaf_nodes() if leaf[0] != "traces"
+        ] + [node]
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def setUp(self):
+        apps = self._migrate(self.migrate_from)
+
+        Organization = apps.get_model("accounts", "Organization")
+        Project = apps.get_model("projects", "Project")
+        Trace = apps.get_model("traces", "Trace")
+        Dataset = apps.get_model("datasets", "Dataset")
+        Annotation = apps.get_model("datasets", "Annotation")
+
+        org = Organization.objects.create(name="Test Org")
+        project = Project.objects.create(name="Test Project", organization=org)
+        now = timezone.now()
+        self.kept, duplicate = [
+            Trace.objects.create(
+                project=project,
+                otel_trace_id="dup",
+                started_at=now,
+                ended_at=now,
+                attributes={},
+            )
+            for _ in range(2)
+        ]
+        shared = Dataset.objects.create(name="Shared", project=project)
+        only_duplicate = Dataset.objects.create(name="Only dup", project=project)
+
+        # The kept trace already has rows for `shared`: the duplicate's link
+        # is dropped and its annotation merged into the kept one. Its
+        # `only_duplicate` rows are moved over.
+        shared.traces.add(self.kept, duplicate)
+        only_duplicate.traces.add(duplicate)
+        FailureMode = apps.get_model("datasets", "FailureMode")
+        failure_mode = FailureMode.objects.create(name="Wrong tool", project=project)
+        Annotation.objects.create(trace=self.kept, dataset=shared, notes="kept")
+        Annotation.objects.create(
+            trace=duplicate, dataset=shared, notes="merged"
+        ).failure_modes.add(failure_mode)
+        Annotation.objects.create(
+            trace=duplicate, dataset=only_duplicate, notes="moved"
+        )
+
+        self.apps = self._migrate(self.migrate_to)
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_duplicates_are_merged_keeping_annotations_and_datasets(self):
+        """Test that annotations and dataset links end up on the kept trace."""
+        Trace = self.apps.get_model("traces", "Trace")
+        Dataset = self.apps.get_model("datasets", "Dataset")
+        Annotation = self.apps.get_model("datasets", "Annotation")
+
+        self.assertEqual(
+            list(Trace.objects.values_list("id", flat=True)), [self.kept.id]
+        )
+        self.assertEqual(
+            sorted(
+                Dataset.objects.filter(traces=self.kept.id).values_list(
+                    "name", flat=True
+                )
+            ),
+            ["Only dup", "Shared"],
+        )
+        self.assertEqual(
+            sorted(
+                Annotation.objects.filter(trace_id=self.kept.id).values_list(
+                    "notes", flat=True
+                )
+            ),
+            ["kept\n\nmerged", "moved"],
+        )
+        merged = Annotation.objects.get(trace_id=self.kept.id, dataset__name="Shared")
+        self.assertEqual(
+            list(merged.failure_modes.values_list("name", flat=True)), ["Wrong tool"]
+        )
@@ -0,0 +1,139 @@
+from datetime import datetime, timezone as dt_timezone
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from opentelemetry.proto.trace.v1.trace_pb2 import TracesData
+from accounts.models import Organization
+from projects.models import Project
+from traces.models import RawTrace, Trace, Span
+
+
+def build_payload(span_name="Span 1", span_attributes=None):
+    """Build a serialized OTLP TracesData payload with a single span."""
+    traces_data = TracesData()
+    resource_span = traces_data.resource_spans.add()
+    attr = resource_span.resource.attributes.add()
+    attr.key = "service.name"
+    attr.value.string_value = "test-service"
+
+    span = resource_span.scope_spans.add().spans.add()
+    span.trace_id = bytes.fromhex("0af7651916cd43dd8448eb211c80319c")
+    span.span_id = bytes.fromhex("b7ad6b7169203331")
+    span.name = span_name
+    span.start_time_unix_nano = 1_700_000_000_000_000_000
+    span.end_time_unix_nano = 1_700_000_000_250_000_000
+    for key, value in (span_attributes or {}).items():
+        attr = span.attributes.add()
+        attr.key = key
+        if isinstance(value, int):
+            attr.value.int_value = value
+        else:
+            attr.value.string_value = value
+    return traces_data.SerializeToString()
+
+
+class RawTraceModelTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="Test Org")
+        self.project = Project.objects.create(
+            name="Test Project", organization=self.org
+        )
+        self.raw_trace = RawTrace.objects.create(
+            project=self.project,
+            received_at=timezone.now(),
+            payload_protobuf=build_payload(),
+        )
+
+    def test_parse_protobuf_is_memoized(self):
+        """Test that parse_protobuf parses the payload only once."""
+        first = self.raw_trace.parse_protobuf()
+        self.assertIs(self.raw_trace.parse_protobuf(), first)
+
+    def test_save_with_new_payload_invalidates_parsed_payload(self):
+        """Test that saving a new payload drops the memoized message."""
+        self.raw_trace.parse_protobuf()
+        self.raw_trace.payload_protobuf = build_payload(span_name="Span 2")
+        self.raw_trace.save()
+
+        traces_data = self.raw_trace.parse_protobuf()
+        span = traces_data.resource_spans[0].scope_spans[0].spans[0]
+        self.assertEqual(span.name, "Span 2")
+
+    def test_status_only_save_keeps_parsed_payload(self):
+        """Test that saving unrelated fields keeps the memoized message."""
+        first = self.raw_trace.parse_protobuf()
+        self.raw_trace.status = RawTrace.STATUS_PROCESSED
+        self.raw_trace.save(update_fields=["status"])
+        self.assertIs(self.raw_trace.parse_protobuf(), first)
+
+    def test_process_creates_trace_and_spans(self):
+        """Test that process creates a Trace and its Spans from the payload."""
+        trace = self.raw_trace.process()
+
+        self.assertEqual(trace.otel_trace_id, "0af7651916cd43dd8448eb211c80319c")
+        self.assertEqual(trace.service_name, "test-service")
+        self.assertEqual(trace.attributes, {"service.name": "test-service"})
+        self.assertEqual(
+            trace.started_at, datetime(2023, 11, 14, 22, 13, 20, tzinfo=dt_timezone.utc)
+        )
+
+        span = Span.objects.get(trace=trace)
+        self.assertEqual(span.otel_span_id, "b7ad6b7169203331")
+        self.assertEqual(span.name, "Span 1")
+        self.assertEqual((span.end_time - span.start_time).total_seconds(), 0.25)
+
+        self.raw_trace.refresh_from_db()
+        self.assertEqual(self.raw_trace.status, RawTrace.STATUS_PROCESSED)
+
+    def test_process_extracts_gen_ai_fields(self):
+        """Test that gen_ai span attributes are mapped onto Span fields."""
+        self.raw_trace.payload_protobuf = build_payload(
+            span_attributes={
+                "gen_ai.request.model": "gpt-4o",
+                "gen_ai.usage.input_tokens": 12,
+                "gen_ai.input.messages": '[{"role": "user", "parts": []}]',
+            }
+        )
+        self.raw_trace.save()
+
+        trace = self.raw_trace.process()
+
+        span = Span.objects.get(trace=trace)
+        self.assertEqual(span.request_model, "gpt-4o")
+        self.assertEqual(span.input_tokens, 12)
+        self.assertEqual(span.input_messages, [{"role": "user", "parts": []}])
+
+    def test_reprocessing_updates_existing_trace(self):
+        """Test that processing the same trace twice reuses the Trace row."""
+        self.raw_trace.process()
+        self.raw_trace.process()
+
+        self.assertEqual(Trace.objects.filter(project=self.project).count(), 1)
+
+    def test_reprocessing_updates_existing_spans(self):
+        """Test that a re-sent span updates the stored row instead of duplicating."""
+        self.raw_trace.process()
+        self.raw_trace.payload_protobuf = build_payload(
+            span_attributes={"gen_ai.usage.output_tokens": 7}
+        )
+        self.raw_trace.save()
+
+        trace = self.raw_trace.process()
+
+        span = Span.objects.get(trace=trace)
+        self.assertEqual(span.output_tokens, 7)
+
+    def test_reprocessing_unchanged_trace_skips_update(self):
+        """Test that re-processing an identical payload does not write the Trace."""
+        self.raw_trace.process()
+
+        with CaptureQueriesContext(connection) as queries:
+            self.raw_trace.process()
+
+        self.assertFalse(
+            any(
+                query["sql"].startswith('UPDATE "traces_trace"')
+                for query in queries.captured_queries
+            )
+        )
@@ -0,0 +1,111 @@
+from unittest.mock import patch
+
+from django.db import IntegrityError, OperationalError
+from django.test import TestCase
+from django.utils import timezone
+from opentelemetry.proto.trace.v1.trace_pb2 import TracesData
+from accounts.models import Organization
+from projects.models import Project
+from traces.models import RawTrace, Trace, Span, SpanQuerySet
+from traces.tasks import ingest_trace, process_pending_traces
+from traces.tests.test_models import build_payload
+
+
+class IngestTraceTaskTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="Test Org")
+        self.project = Project.objects.create(
+            name="Test Project", organization=self.org
+        )
+
+    def test_ingest_trace_stores_pending_payload(self):
+        """Test that ingest_trace persists the RawTrace for batch processing."""
+        raw_trace_id = ingest_trace(self.project.id, timezone.now(), build_payload())
+
+        raw_trace = RawTrace.objects.get(id=raw_trace_id)
+        self.assertEqual(raw_trace.project, self.project)
+        self.assertEqual(raw_trace.status, RawTrace.STATUS_PENDING)
+
+    def test_process_pending_traces_processes_in_batches(self):
+        """Test that the sweeper processes pending RawTraces and their spans."""
+        ingest_trace(self.project.id, timezone.now(), build_payload())
+        ingest_trace(self.project.id, timezone.now(), b"not a protobuf payload")
+
+        with self.assertLogs("traces.models", "ERROR"):
+            processed = process_pending_traces()
+
+        self.assertEqual(processed, 1)
+        trace = Trace.objects.get(project=self.project)
+        self.assertEqual(Span.objects.filter(trace=trace).count(), 1)
+        self.assertEqual(
+            sorted(RawTrace.objects.values_list("status", flat=True)),
+            [RawTrace.STATUS_PROCESSED, RawTrace.STATUS_ERROR],
+        )
+
+    def test_failing_span_write_only_marks_its_raw_trace_as_error(self):
+        """Test that a RawTrace whose spans cannot be stored does not block others."""
+        bad = RawTrace.objects.get(
+            id=ingest_trace(
+                self.project.id, timezone.now(), build_payload(span_name="bad")
+            )
+        )
+        good = RawTrace.objects.get(
+            id=ingest_trace(
+                self.project.id, timezone.now(), build_payload(span_name="good")
+            )
+        )
+        upsert = SpanQuerySet.upsert
+
+        def failing_upsert(queryset, span_objects, **kwargs):
+            # Stands in for a database error such as an over-long column
+            if any(span.name == "bad" for span in span_objects):
+                raise IntegrityError("span rejected")
+            return upsert(queryset, span_objects, **kwargs)
+
+        with (
+            patch.object(SpanQuerySet, "upsert", failing_upsert),
+            self.assertLogs("traces.models", "ERROR") as logs,
+        ):
+            processed = process_pending_traces()
+
+        self.assertEqual(processed, 1)
+        bad.refresh_from_db()
+        good.refresh_from_db()
+        self.assertEqual(bad.status, RawTrace.STATUS_ERROR)
+        self.assertEqual(good.status, RawTrace.STATUS_PROCESSED)
+        self.assertEqual(list(Span.objects.values_list("name", flat=True)), ["good"])
+        self.assertIn(f"Failed to process RawTrace {bad.id}", "\n".join(logs.output))
+
+    def test_operational_error_leaves_raw_trace_pending(self):
+        """Test that a transient database error does not mark the payload as error."""
+        raw_trace_id = ingest_trace(self.project.id, timezone.now(), build_payload())
+
+        with (
+            patch.object(
+                SpanQuerySet,
+                "upsert",
+                side_effect=OperationalError("database is locked"),
+            ),
+            self.assertLogs("traces.models", "ERROR"),
+        ):
+            processed = process_pending_traces()
+
+        self.assertEqual(processed, 0)
+        raw_trace = RawTrace.objects.get(id=raw_trace_id)
+        self.assertEqual(raw_trace.status, RawTrace.STATUS_PENDING)
+        self.assertFalse(Span.objects.exists())
+
+        # A later run picks it up once the database is available again
+        self.assertEqual(process_pending_traces(), 1)
+
+    def test_span_without_id_is_stored(self):
+        """Test that a span with an empty span_id does not fail the batch."""
+        traces_data = TracesData()
+        traces_data.ParseFromString(build_payload())
+        traces_data.resource_spans[0].scope_spans[0].spans[0].span_id = b""
+        ingest_trace(self.project.id, timezone.now(), traces_data.SerializeToString())
+
+        process_pending_traces()
+
+        self.assertEqual(Span.objects.get().otel_span_id, "")
+        self.assertEqual(RawTrace.objects.get().status, RawTrace.STATUS_PROCESSED)
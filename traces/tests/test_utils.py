@@ -0,0 +1,156 @@
+from datetime import timedelta
+
+from django.test import SimpleTestCase
+from opentelemetry.proto.common.v1.common_pb2 import KeyValue
+from opentelemetry.proto.trace.v1.trace_pb2 import TracesData
+from traces.models import Span
+from traces.utils import (
+    extract_gen_ai_fields,
+    extract_trace_data,
+    format_timedelta,
+    parse_attributes,
+)
+
+
+def build_attribute(key, **value):
+    """Build an OTLP KeyValue attribute, e.g. build_attribute("k", int_value=1)."""
+    attr = KeyValue(key=key)
+    for kind, val in value.items():
+        if kind == "array_value":
+            for item in val:
+                attr.value.array_value.values.add(string_value=item)
+        else:
+            setattr(attr.value, kind, val)
+    return attr
+
+
+class FormatTimedeltaTests(SimpleTestCase):
+    def test_sub_second(self):
+        """Test that durations under a second are shown in whole milliseconds."""
+        self.assertEqual(format_timedelta(timedelta(microseconds=250_999)), "250ms")
+        self.assertEqual(format_timedelta(timedelta(0)), "0ms")
+
+    def test_seconds_and_minutes(self):
+        """Test that longer durations are shown in seconds, then minutes."""
+        self.assertEqual(
+            format_timedelta(timedelta(seconds=59, microseconds=999_999)), "59s"
+        )
+        self.assertEqual(format_timedelta(timedelta(days=1, seconds=5)), "1440m 5s")
+
+    def test_none(self):
+        self.assertIsNone(format_timedelta(None))
+
+
+class ParseAttributesTests(SimpleTestCase):
+    def test_parses_scalar_values(self):
+        """Test that each scalar AnyValue kind is converted to a Python value."""
+        attributes = [
+            build_attribute("str", string_value="hello"),
+            build_attribute("int", int_value=42),
+            build_attribute("bool", bool_value=True),
+            build_attribute("double", double_value=0.5),
+        ]
+
+        self.assertEqual(
+            parse_attributes(attributes),
+            {"str": "hello", "int": 42, "bool": True, "double": 0.5},
+        )
+
+    def test_parses_array_values(self):
+        """Test that array values are extracted recursively."""
+        attributes = [build_attribute("list", array_value=["a", "b"])]
+
+        self.assertEqual(parse_attributes(attributes), {"list": ["a", "b"]})
+
+    def test_bytes_values_are_base64_encoded(self):
+        """Test that bytes values stay JSON serializable."""
+        attributes = [build_attribute("raw", bytes_value=b"\x00\x01")]
+
+        self.assertEqual(parse_attributes(attributes), {"raw": "AAE="})
+
+    def test_parses_kvlist_values(self):
+        """Test that kvlist values become dicts, including inside arrays."""
+        attr = KeyValue(key="messages")
+        message = attr.value.array_value.values.add().kvlist_value
+        message.values.add(key="role").value.string_value = "user"
+        message.values.add(key="index").value.int_value = 0
+
+        self.assertEqual(
+            parse_attributes([attr]), {"messages": [{"role": "user", "index": 0}]}
+        )
+
+    def test_empty_attributes(self):
+        """Test that no attributes yields an empty dict."""
+        self.assertEqual(parse_attributes([]), {})
+
+
+class ExtractGenAiFieldsTests(SimpleTestCase):
+    def test_maps_and_coerces_gen_ai_attributes(self):
+        """Test that known gen_ai keys are mapped and other keys are skipped."""
+        attributes = [
+            build_attribute("http.method", string_value="POST"),
+            build_attribute("gen_ai.request.model", string_value="gpt-4o"),
+            build_attribute("gen_ai.request.max_tokens", string_value="256"),
+            build_attribute("gen_ai.request.top_p", int_value=1),
+            build_attribute("gen_ai.input.messages", string_value='[{"role": "user"}]'),
+            build_attribute("gen_ai.output.messages", string_value="not json"),
+        ]
+
+        self.assertEqual(
+            extract_gen_ai_fields(attributes),
+            {
+                "request_model": "gpt-4o",
+                "max_tokens": 256,
+                "top_p": 1.0,
+                "input_messages": [{"role": "user"}],
+                "output_messages": None,
+            },
+        )
+
+
+class ExtractTraceDataTests(SimpleTestCase):
+    def build_traces_data(self, span_ids):
+        traces_data = TracesData()
+        spans = traces_data.resource_spans.add().scope_spans.add().spans
+        for span_id in span_ids:
+            spans.add(trace_id=b"\x01" * 16, span_id=span_id, name="span")
+        return traces_data
+
+    def test_span_ids_are_hex_encoded(self):
+        """Test that each span gets its own hex-encoded id."""
+        traces_data = self.build_traces_data([b"\x00" * 8, b"\xab" * 8])
+
+        extracted = extract_trace_data(traces_data)
+
+        self.assertEqual(extracted["trace_id"], "01" * 16)
+        self.assertEqual(
+            [span["otel_span_id"] for span in extracted["spans"]],
+            ["00" * 8, "ab" * 8],
+        )
+
+    def test_span_data_keys_are_span_fields(self):
+        """Test that span data can be passed straight to the Span model."""
+        extracted = extract_trace_data(self.build_traces_data([b"\x00" * 8]))
+
+        span_fields = {field.name for field in Span._meta.get_fields()}
+        self.assertLessEqual(set(extracted["spans"][0]), span_fields)
+
+    def test_missing_span_id_does_not_shift_other_ids(self):
+        """Test that a span without an id gets "" and others keep theirs."""
+        traces_data = self.build_traces_data([b"", b"\xab" * 8])
+
+        extracted = extract_trace_data(traces_data)
+
+        self.assertEqual(
+            [span["otel_span_id"] for span in extracted["spans"]], ["", "ab" * 8]
+        )
+
+        # Malformed ids whose lengths add up to a multiple of 8
+        traces_data = self.build_traces_data([b"\x01" * 7, b"\x02" * 9])
+
+        extracted = extract_trace_data(traces_data)
+
+        self.assertEqual(
+            [span["otel_span_id"] for span in extracted["spans"]],
+            ["01" * 7, "02" * 9],
+        )
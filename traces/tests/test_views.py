@@ -1,89 +1,137 @@
-from django.test import TestCase, Client
+import uuid
+from datetime import timedelta
+from django.db import connection
+from django.test import TestCase, SimpleTestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
 from django.urls import reverse
 from django.utils import timezone
 from accounts.models import Organization, UserProfile, Membership
 from projects.models import Project
 from traces.models import Trace, Span
+from traces.views import TRACES_PER_PAGE
 
+# All test users share one password; hash it once instead of per user
+PASSWORD = "testpass123"
+HASHED_PASSWORD = make_password(PASSWORD)
 
-class TraceViewsTestCase(TestCase):
-    def setUp(self):
-        self.client = Client()
 
+class TraceAuthRedirectTests(SimpleTestCase):
+    """Redirects for anonymous users happen before any database access."""
+
+    def test_trace_list_requires_authentication(self):
+        """Test that trace list redirects unauthenticated users."""
+        response = self.client.get(reverse("traces:list"))
+        self.assertEqual(response.status_code, 302)
+        self.assertIn("/accounts/login/", response.url)
+
+    def test_trace_detail_requires_authentication(self):
+        """Test that trace detail redirects unauthenticated users."""
+        response = self.client.get(reverse("traces:detail", args=[uuid.uuid4()]))
+        self.assertEqual(response.status_code, 302)
+        self.assertIn("/accounts/login/", response.url)
+
+
+class TraceViewsTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
         # Create users
-        self.user1 = User.objects.create_user(username="user1", password="testpass123")
-        self.user2 = User.objects.create_user(username="user2", password="testpass123")
+        cls.user1, cls.user2 = User.objects.bulk_create(
+            [
+                User(username="user1", password=HASHED_PASSWORD),
+                User(username="user2", password=HASHED_PASSWORD),
+            ]
+        )
 
         # Create user profiles
-        self.user1_profile = UserProfile.objects.create(user=self.user1)
-        self.user2_profile = UserProfile.objects.create(user=self.user2)
+        cls.user1_profile, cls.user2_profile = UserProfile.objects.bulk_create(
+            [UserProfile(user=cls.user1), UserProfile(user=cls.user2)]
+        )
 
         # Create organizations
-        self.org1 = Organization.objects.create(name="Org 1")
-        self.org2 = Organization.objects.create(name="Org 2")
+        cls.org1, cls.org2 = Organization.objects.bulk_create(
+            [Organization(name="Org 1"), Organization(name="Org 2")]
+        )
 
         # Create memberships
-        self.membership1 = Membership.objects.create(
-            user_profile=self.user1_profile, organization=self.org1, role="admin"
-        )
-        self.membership2 = Membership.objects.create(
-            user_profile=self.user2_profile, organization=self.org2, role="admin"
+        cls.membership1, cls.membership2 = Membership.objects.bulk_create(
+            [
+                Membership(
+                    user_profile=cls.user1_profile, organization=cls.org1, role="admin"
+                ),
+                Membership(
+                    user_profile=cls.user2_profile, organization=cls.org2, role="admin"
+                ),
+            ]
         )
 
         # Create projects
-        self.project1 = Project.objects.create(name="Project 1", organization=self.org1)
-        self.project2 = Project.objects.create(name="Project 2", organization=self.org2)
+        cls.project1, cls.project2 = Project.objects.bulk_create(
+            [
+                Project(name="Project 1", organization=cls.org1),
+                Project(name="Project 2", organization=cls.org2),
+            ]
+        )
 
         # Create traces
         now = timezone.now()
-        self.trace1 = Trace.objects.create(
-            otel_trace_id="trace1",
-            project=self.project1,
-            started_at=now,
-            ended_at=now,
-            attributes={},
-        )
-        self.trace2 = Trace.objects.create(
-            otel_trace_id="trace2",
-            project=self.project2,
-            started_at=now,
-            ended_at=now,
-            attributes={},
+        cls.trace1, cls.trace2 = Trace.objects.bulk_create(
+            [
+                Trace(
+                    otel_trace_id="trace1",
+                    project=cls.project1,
+                    started_at=now,
+                    ended_at=now,
+                    attributes={},
+                ),
+                Trace(
+                    otel_trace_id="trace2",
+                    project=cls.project2,
+                    started_at=now,
+                    ended_at=now,
+                    attributes={},
+                ),
+            ]
         )
 
         # Create spans
-        self.span1 = Span.objects.create(
-            name="Span 1",
-            trace=self.trace1,
-            otel_span_id="span1",
-            start_time=now,
-            end_time=now,
-        )
-        self.span2 = Span.objects.create(
-            name="Span 2",
-            trace=self.trace2,
-            otel_span_id="span2",
-            start_time=now,
-            end_time=now,
+        cls.span1, cls.span2 = Span.objects.bulk_create(
+            [
+                Span(
+                    name="Span 1",
+                    trace=cls.trace1,
+                    otel_span_id="span1",
+                    start_time=now,
+                    end_time=now,
+                ),
+                Span(
+                    name="Span 2",
+                    trace=cls.trace2,
+                    otel_span_id="span2",
+                    start_time=now,
+                    end_time=now,
+                ),
+            ]
         )
 
-    def test_trace_list_requires_authentication(self):
-        """Test that trace list redirects unauthenticated users."""
-        response = self.client.get(reverse("traces:list"))
-        self.assertEqual(response.status_code, 302)
-        self.assertIn("/accounts/login/", response.url)
+        # URLs used across tests
+        cls.list_url = reverse("traces:list")
+        cls.trace1_detail_url = reverse("traces:detail", args=[cls.trace1.uid])
+        cls.trace2_detail_url = reverse("traces:detail", args=[cls.trace2.uid])
 
-    def test_trace_list_clears_invalid_current_project(self):
-        """Test that invalid current_project_id is cleared and first project is auto-selected."""
-        self.client.login(username="user1", password="testpass123")
-
-        # Set invalid project ID in session
+    def _set_project(self, project_id):
+        """Set the current project in the test client's session."""
         session = self.client.session
-        session["current_project_id"] = 99999
+        session["current_project_id"] = project_id
         session.save()
 
-        response = self.client.get(reverse("traces:list"))
+    def test_trace_list_clears_invalid_current_project(self):
+        """Test that invalid current_project_id is cleared and first project is auto-selected."""
+        self.client.force_login(self.user1)
+        self._set_project(99999)
+
+        response = self.client.get(self.list_url)
         # With auto-select, invalid project is cleared and first valid project is selected
         self.assertEqual(response.status_code, 200)
 
@@ -94,7 +142,7 @@ class TraceViewsTestCase(TestCase):
     def test_trace_list_empty_for_user_with_no_traces(self):
         """Test that trace list shows empty message when user has no traces for current project."""
         # Create user with no traces
-        user3 = User.objects.create_user(username="user3", password="testpass123")
+        user3 = User.objects.create(username="user3", password=HASHED_PASSWORD)
         user3_profile = UserProfile.objects.create(user=user3)
         org3 = Organization.objects.create(name="Org 3")
         Membership.objects.create(
@@ -102,27 +150,140 @@ class TraceViewsTestCase(TestCase):
         )
         project3 = Project.objects.create(name="Project 3", organization=org3)
 
-        self.client.login(username="user3", password="testpass123")
+        self.client.force_login(user3)
+        self._set_project(project3.id)
 
-        # Set current project in session
-        session = self.client.session
-        session["current_project_id"] = project3.id
-        session.save()
-
-        response = self.client.get(reverse("traces:list"))
+        response = self.client.get(self.list_url)
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "No traces found")
 
-    def test_trace_detail_requires_authentication(self):
-        """Test that trace detail redirects unauthenticated users."""
-        response = self.client.get(reverse("traces:detail", args=[self.trace1.uid]))
-        self.assertEqual(response.status_code, 302)
-        self.assertIn("/accounts/login/", response.url)
+    def test_trace_list_shows_duration(self):
+        """Test that trace list shows each trace's duration."""
+        Trace.objects.filter(pk=self.trace1.pk).update(
+            ended_at=self.trace1.started_at + timedelta(seconds=90)
+        )
+        self.client.force_login(self.user1)
+        self._set_project(self.project1.id)
+
+        response = self.client.get(self.list_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "1m 30s")
+
+    def test_trace_list_count_does_not_join_spans(self):
+        """Test that paginating the trace list does not aggregate all spans."""
+        self.client.force_login(self.user1)
+        self._set_project(self.project1.id)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.list_url)
+
+        count_queries = [
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith("SELECT COUNT(*)")
+            and '"traces_trace"' in query["sql"]
+        ]
+        self.assertEqual(len(count_queries), 1)
+        self.assertNotIn("traces_span", count_queries[0])
+
+    def test_trace_list_looks_up_memberships_once(self):
+        """Test that user projects are resolved once per request."""
+        self.client.force_login(self.user1)
+        self._set_project(self.project1.id)
+        # First request caches the current project's details in the session
+        self.client.get(self.list_url)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.list_url)
+
+        membership_queries = [
+            query
+            for query in queries.captured_queries
+            if query["sql"].startswith("SELECT")
+            and 'FROM "accounts_membership"' in query["sql"]
+        ]
+        self.assertEqual(len(membership_queries), 1)
+
+    def test_trace_list_revalidates_current_project_once(self):
+        """Test that the current project access check runs once per request."""
+        self.client.force_login(self.user1)
+        self._set_project(self.project1.id)
+        # First request caches the current project's details in the session
+        self.client.get(self.list_url)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.list_url)
+
+        access_queries = [
+            query
+            for query in queries.captured_queries
+            if query["sql"].startswith('SELECT "projects_project"."name"')
+        ]
+        self.assertEqual(len(access_queries), 1)
+
+    def test_trace_list_shows_span_summary(self):
+        """Test that trace list annotates span count and token totals."""
+        Span.objects.filter(pk=self.span1.pk).update(input_tokens=10, output_tokens=5)
+        self.client.force_login(self.user1)
+        self._set_project(self.project1.id)
+
+        response = self.client.get(self.list_url)
+        trace = response.context["traces"][0]
+        self.assertEqual(trace.span_count, 1)
+        self.assertEqual(trace.total_input_tokens, 10)
+        self.assertEqual(trace.total_output_tokens, 5)
+        self.assertContains(response, "<td>15</td>", html=True)
+
+    def test_trace_list_is_paginated(self):
+        """Test that trace list splits a project's traces into pages."""
+        now = timezone.now()
+        Trace.objects.bulk_create(
+            Trace(
+                otel_trace_id=f"extra{i}",
+                project=self.project1,
+                started_at=now - timedelta(minutes=i + 1),
+                ended_at=now,
+                attributes={},
+            )
+            for i in range(TRACES_PER_PAGE)
+        )
+        self.client.force_login(self.user1)
+        self._set_project(self.project1.id)
+
+        response = self.client.get(self.list_url)
+        self.assertEqual(len(response.context["traces"]), TRACES_PER_PAGE)
+
+        response = self.client.get(self.list_url, {"page": 2})
+        self.assertEqual(len(response.context["traces"]), 1)
+
+    def test_trace_list_pages_are_stable_for_equal_timestamps(self):
+        """Test that traces sharing started_at are neither repeated nor skipped."""
+        now = timezone.now()
+        Trace.objects.bulk_create(
+            Trace(
+                otel_trace_id=f"tied{i}",
+                project=self.project1,
+                started_at=now,
+                ended_at=now,
+                attributes={},
+            )
+            for i in range(TRACES_PER_PAGE)
+        )
+        self.client.force_login(self.user1)
+        self._set_project(self.project1.id)
+
+        seen = []
+        for page in (1, 2):
+            response = self.client.get(self.list_url, {"page": page})
+            seen.extend(trace.uid for trace in response.context["traces"])
+
+        self.assertEqual(len(seen), TRACES_PER_PAGE + 1)
+        self.assertEqual(len(set(seen)), len(seen))
 
     def test_trace_detail_requires_current_project(self):
         """Test that trace detail auto-selects first project when none is set."""
-        self.client.login(username="user1", password="testpass123")
-        response = self.client.get(reverse("traces:detail", args=[self.trace1.uid]))
+        self.client.force_login(self.user1)
+        response = self.client.get(self.trace1_detail_url)
         # With auto-select, first project is automatically selected and view succeeds
         self.assertEqual(response.status_code, 200)
 
@@ -132,44 +293,45 @@ class TraceViewsTestCase(TestCase):
 
     def test_trace_detail_access_control(self):
         """Test that users cannot view traces outside their projects."""
-        self.client.login(username="user1", password="testpass123")
-
-        # Set current project in session
-        session = self.client.session
-        session["current_project_id"] = self.project1.id
-        session.save()
+        self.client.force_login(self.user1)
+        self._set_project(self.project1.id)
 
-        response = self.client.get(reverse("traces:detail", args=[self.trace2.uid]))
+        response = self.client.get(self.trace2_detail_url)
         self.assertEqual(response.status_code, 302)  # Redirects with error message
         self.assertEqual(response.url, reverse("projects:list"))
 
     def test_trace_detail_shows_trace_info(self):
         """Test that trace detail shows trace information."""
-        self.client.login(username="user1", password="testpass123")
+        self.client.force_login(self.user1)
+        self._set_project(self.project1.id)
 
-        # Set current project in session
-        session = self.client.session
-        session["current_project_id"] = self.project1.id
-        session.save()
-
-        response = self.client.get(reverse("traces:detail", args=[self.trace1.uid]))
+        response = self.client.get(self.trace1_detail_url)
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "trace1")
 
     def test_trace_detail_shows_spans(self):
         """Test that trace detail shows all associated spans."""
-        self.client.login(username="user1", password="testpass123")
-
-        # Set current project in session
-        session = self.client.session
-        session["current_project_id"] = self.project1.id
-        session.save()
+        self.client.force_login(self.user1)
+        self._set_project(self.project1.id)
 
-        response = self.client.get(reverse("traces:detail", args=[self.trace1.uid]))
+        response = self.client.get(self.trace1_detail_url)
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "Span 1")
         self.assertContains(response, "span1")
 
+    def test_trace_detail_pretty_prints_span_json(self):
+        """Test that span JSON fields are pretty-printed and HTML-escaped."""
+        Span.objects.filter(pk=self.span1.pk).update(
+            input_messages=[{"role": "user", "content": "<b>hi</b>"}]
+        )
+        self.client.force_login(self.user1)
+        self._set_project(self.project1.id)
+
+        response = self.client.get(self.trace1_detail_url)
+        self.assertContains(response, "&quot;role&quot;: &quot;user&quot;")
+        self.assertContains(response, "&lt;b&gt;hi&lt;/b&gt;")
+        self.assertNotContains(response, "<b>hi</b>")
+
     def test_trace_detail_only_shows_spans_for_that_trace(self):
         """Test that spans from other traces are not shown."""
         # Create another span for trace1
@@ -182,14 +344,10 @@ class TraceViewsTestCase(TestCase):
             end_time=now,
         )
 
-        self.client.login(username="user1", password="testpass123")
+        self.client.force_login(self.user1)
+        self._set_project(self.project1.id)
 
-        # Set current project in session
-        session = self.client.session
-        session["current_project_id"] = self.project1.id
-        session.save()
-
-        response = self.client.get(reverse("traces:detail", args=[self.trace1.uid]))
+        response = self.client.get(self.trace1_detail_url)
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "Span 1")
         self.assertContains(response, "Span 3")
@@ -197,10 +355,8 @@ class TraceViewsTestCase(TestCase):
 
     def test_trace_detail_404_for_nonexistent_trace(self):
         """Test that trace detail returns 404 for nonexistent trace."""
-        self.client.login(username="user1", password="testpass123")
+        self.client.force_login(self.user1)
         # Use a UUID that doesn't exist
-        import uuid
-
         fake_uid = uuid.uuid4()
         response = self.client.get(reverse("traces:detail", args=[fake_uid]))
         self.assertEqual(response.status_code, 404)
@@ -1,23 +1,42 @@
 import base64
-import json
-from datetime import datetime
+from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import chain
+import orjson
 from django.utils import timezone
 
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.UTC)
 
+
+# Spans of one trace often share start/end timestamps; datetimes are
+# immutable, so conversions can be reused across spans and payloads
+@lru_cache(maxsize=4096)
 def convert_nano_to_datetime(nano_timestamp: int) -> datetime:
-    return datetime.fromtimestamp(nano_timestamp / 1e9, timezone.UTC)
+    # Integer arithmetic avoids the float rounding of fromtimestamp(ns / 1e9)
+    return _EPOCH + timedelta(microseconds=nano_timestamp // 1000)
 
 
 def format_duration(start, end):
     """Format duration between two datetimes as a human-readable string."""
     if not start or not end:
         return None
-    delta = end - start
-    total_seconds = int(delta.total_seconds())
-    if total_seconds < 1:
-        milliseconds = int(delta.total_seconds() * 1000)
+    return format_timedelta(end - start)
+
+
+# Many spans on a page share the same duration; timedeltas are hashable
+@lru_cache(maxsize=2048)
+def format_timedelta(delta):
+    """Format a timedelta as a human-readable string."""
+    if delta is None:
+        return None
+    # Integer milliseconds, without going through float total_seconds()
+    milliseconds = (
+        delta.days * 86_400_000 + delta.seconds * 1000 + delta.microseconds // 1000
+    )
+    if milliseconds < 1000:
         return f"{milliseconds}ms"
-    elif total_seconds < 60:
+    total_seconds = milliseconds // 1000
+    if total_seconds < 60:
         return f"{total_seconds}s"
     else:
         minutes = total_seconds // 60
@@ -25,262 +44,307 @@ def format_duration(start, end):
         return f"{minutes}m {seconds}s"
 
 
+def _joined_text(parts):
+    """Join the non-empty text parts of a message, or return None if there are none."""
+    return (
+        "\n".join(
+            part["content"]
+            for part in parts
+            if isinstance(part, dict)
+            and part.get("type") == "text"
+            and part.get("content")
+        )
+        or None
+    )
+
+
 def extract_conversation_messages(spans):
     """
     Extract conversation messages from spans.
     Returns a list of message dictionaries with role, content, and metadata.
     """
     conversation = []
+    append = conversation.append
 
     for span in spans:
+        span_id = span.id
+        span_name = span.name
+        input_messages = span.input_messages
+        output_messages = span.output_messages
+
         # Extract input messages (user and system messages)
-        if span.input_messages and isinstance(span.input_messages, list):
-            for msg in span.input_messages:
-                if isinstance(msg, dict):
-                    role = msg.get("role")
-                    if role in ("user", "system"):
-                        parts = msg.get("parts", [])
-                        content_parts = []
-                        for part in parts:
-                            if isinstance(part, dict) and part.get("type") == "text":
-                                content = part.get("content", "")
-                                if content:
-                                    content_parts.append(content)
-
-                        if content_parts:
-                            conversation.append(
-                                {
-                                    "role": role,
-                                    "content": "\n".join(content_parts),
-                                    "span_id": span.id,
-                                    "span_name": span.name,
-                                    "timestamp": span.start_time,
-                                }
-                            )
+        if input_messages and isinstance(input_messages, list):
+            for msg in input_messages:
+                if not isinstance(msg, dict):
+                    continue
+                role = msg.get("role")
+                if role not in ("user", "system"):
+                    continue
+                content = _joined_text(msg.get("parts", []))
+                if content:
+                    append(
+                        {
+                            "role": role,
+                            "content": content,
+                            "span_id": span_id,
+                            "span_name": span_name,
+                            "timestamp": span.start_time,
+                        }
+                    )
 
         # Extract output messages (assistant messages)
-        if span.output_messages and isinstance(span.output_messages, list):
-            for msg in span.output_messages:
-                if isinstance(msg, dict) and msg.get("role") == "assistant":
-                    parts = msg.get("parts", [])
-                    content_parts = []
-                    for part in parts:
-                        if isinstance(part, dict) and part.get("type") == "text":
-                            content = part.get("content", "")
-                            if content:
-                                content_parts.append(content)
-
-                    if content_parts:
-                        conversation.append(
-                            {
-                                "role": "assistant",
-                                "content": "\n".join(content_parts),
-                                "finish_reason": msg.get("finish_reason"),
-                                "span_id": span.id,
-                                "span_name": span.name,
-                                "timestamp": span.end_time or span.start_time,
-                            }
-                        )
+        if output_messages and isinstance(output_messages, list):
+            for msg in output_messages:
+                if not isinstance(msg, dict) or msg.get("role") != "assistant":
+                    continue
+                content = _joined_text(msg.get("parts", []))
+                if content:
+                    append(
+                        {
+                            "role": "assistant",
+                            "content": content,
+                            "finish_reason": msg.get("finish_reason"),
+                            "span_id": span_id,
+                            "span_name": span_name,
+                            "timestamp": span.end_time or span.start_time,
+                        }
+                    )
 
     return conversation
 
 
-def extract_attribute_value(attr: dict):
-    value_dict = attr.get("value", {})
-
-    if "string_value" in value_dict:
-        return value_dict["string_value"]
-    elif "int_value" in value_dict:
-        return int(value_dict["int_value"])
-    elif "bool_value" in value_dict:
-        return value_dict["bool_value"]
-    elif "double_value" in value_dict:
-        return float(value_dict["double_value"])
-    elif "array_value" in value_dict:
-        # Recursively extract values from array
-        values = value_dict["array_value"].get("values", [])
-        return [extract_attribute_value({"value": val}) for val in values]
-    elif "bytes_value" in value_dict:
-        return value_dict["bytes_value"]
-    else:
-        return None
+def extract_attribute_value(attr):
+    """Extract the Python value of an OTLP KeyValue attribute."""
+    return _extract_any_value(attr.value)
 
 
-def parse_attributes(trace_attributes: list) -> dict:
-    result = {}
+def _extract_array_value(array_value):
+    # Recursively extract values from array
+    return [_extract_any_value(val) for val in array_value.values]
 
-    if not trace_attributes:
-        return result
 
-    for attr in trace_attributes:
-        key = attr.get("key")
-        value = extract_attribute_value(attr)
-        if key:
-            result[key] = value
+def _encode_bytes_value(bytes_value):
+    # Base64-encode so the value stays JSON serializable
+    return base64.b64encode(bytes_value).decode("ascii")
 
-    return result
 
+def _extract_kvlist_value(kvlist_value):
+    # Structured values (e.g. gen_ai messages sent as OTLP maps) need no JSON hop
+    return {kv.key: _extract_any_value(kv.value) for kv in kvlist_value.values}
 
-def extract_gen_ai_fields(span_attributes: dict) -> dict:
-    # Mapping from protobuf attribute keys to Span model field names
-    field_mapping = {
-        "gen_ai.provider.name": "provider_name",
-        "gen_ai.operation.name": "operation_name",
-        "gen_ai.request.model": "request_model",
-        "gen_ai.request.max_tokens": "max_tokens",
-        "gen_ai.request.top_p": "top_p",
-        "gen_ai.response.id": "response_id",
-        "gen_ai.response.model": "response_model",
-        "gen_ai.response.finish_reasons": "finished_reasons",
-        "gen_ai.usage.input_tokens": "input_tokens",
-        "gen_ai.usage.output_tokens": "output_tokens",
-        "gen_ai.system_instructions": "system_instructions",
-        "gen_ai.input.messages": "input_messages",
-        "gen_ai.output.messages": "output_messages",
-    }
 
-    json_fields = [
-        "input_messages",
-        "output_messages",
-        "system_instructions",
-        "finished_reasons",
-    ]
-    int_fields = ["max_tokens", "input_tokens", "output_tokens"]
-    float_fields = ["top_p"]
+# AnyValue kinds whose protobuf value is already a plain Python value
+_SCALAR_VALUE_KINDS = frozenset(
+    {"string_value", "int_value", "bool_value", "double_value"}
+)
 
-    result = {}
+# Converters for the remaining supported AnyValue kinds
+_VALUE_HANDLERS = {
+    "array_value": _extract_array_value,
+    "kvlist_value": _extract_kvlist_value,
+    "bytes_value": _encode_bytes_value,
+}
 
-    for proto_key, model_key in field_mapping.items():
-        if proto_key not in span_attributes:
-            continue
 
-        value = span_attributes[proto_key]
-
-        # Handle JSON string parsing for messages
-        if model_key in json_fields:
-            if isinstance(value, str):
-                try:
-                    value = json.loads(value)
-                except (json.JSONDecodeError, TypeError):
-                    # If parsing fails, keep as None or original value
-                    value = None
-        # Ensure int fields are integers
-        elif model_key in int_fields:
-            if value is not None:
-                try:
-                    value = int(value)
-                except (ValueError, TypeError):
-                    value = None
-        # Ensure float fields are floats
-        elif model_key in float_fields:
-            if value is not None:
-                try:
-                    value = float(value)
-                except (ValueError, TypeError):
-                    value = None
+def _extract_any_value(any_value):
+    kind = any_value.WhichOneof("value")
 
-        result[model_key] = value
+    if kind in _SCALAR_VALUE_KINDS:
+        return getattr(any_value, kind)
 
-    return result
+    handler = _VALUE_HANDLERS.get(kind)
+    if handler is None:
+        return None
+    return handler(getattr(any_value, kind))
+
+
+def parse_attributes(trace_attributes) -> dict:
+    if not trace_attributes:
+        return {}
+
+    extract_value = _extract_any_value
+    return {
+        attr.key: extract_value(attr.value) for attr in trace_attributes if attr.key
+    }
 
 
-def _decode_base64_id(id_b64: str | None) -> str | None:
-    if not id_b64:
+# Mapping from protobuf attribute keys to Span model field names
+_GEN_AI_FIELD_MAPPING = {
+    "gen_ai.provider.name": "provider_name",
+    "gen_ai.operation.name": "operation_name",
+    "gen_ai.request.model": "request_model",
+    "gen_ai.request.max_tokens": "max_tokens",
+    "gen_ai.request.top_p": "top_p",
+    "gen_ai.response.id": "response_id",
+    "gen_ai.response.model": "response_model",
+    "gen_ai.response.finish_reasons": "finished_reasons",
+    "gen_ai.usage.input_tokens": "input_tokens",
+    "gen_ai.usage.output_tokens": "output_tokens",
+    "gen_ai.system_instructions": "system_instructions",
+    "gen_ai.input.messages": "input_messages",
+    "gen_ai.output.messages": "output_messages",
+}
+
+
+def _parse_json(value):
+    # Handle JSON string parsing for messages
+    if isinstance(value, str):
+        try:
+            return orjson.loads(value)
+        except orjson.JSONDecodeError:
+            # If parsing fails, keep as None or original value
+            return None
+    return value
+
+
+def _to_int(value):
+    # Ensure int fields are integers; int_value attributes already are
+    if type(value) is int or value is None:
+        return value
+    try:
+        return int(value)
+    except (ValueError, TypeError):
         return None
+
+
+def _to_float(value):
+    # Ensure float fields are floats; double_value attributes already are
+    if type(value) is float or value is None:
+        return value
     try:
-        return base64.b64decode(id_b64).hex()
-    except Exception:
+        return float(value)
+    except (ValueError, TypeError):
         return None
 
 
-def _process_span(span: dict) -> dict:
+# Per Span field conversion; fields not listed keep the attribute value as is
+_FIELD_CONVERTERS = {
+    "input_messages": _parse_json,
+    "output_messages": _parse_json,
+    "system_instructions": _parse_json,
+    "finished_reasons": _parse_json,
+    "max_tokens": _to_int,
+    "input_tokens": _to_int,
+    "output_tokens": _to_int,
+    "top_p": _to_float,
+}
+
+
+def extract_gen_ai_fields(span_attributes, result: dict | None = None) -> dict:
     """
-    Process a single span from protobuf dict structure.
+    Extract gen_ai Span model fields from OTLP KeyValue span attributes.
 
-    Returns a dict with span data ready for Span model creation.
+    Walks the attributes once and only decodes values of known gen_ai keys,
+    without building an intermediate dict of every attribute. Fields are
+    added to `result` when given, otherwise to a new dict.
     """
-    # Decode span_id from base64
-    span_id = _decode_base64_id(span.get("span_id"))
+    if result is None:
+        result = {}
 
-    # Extract basic span fields
-    name = span.get("name", "")
+    for attr in span_attributes:
+        model_key = _GEN_AI_FIELD_MAPPING.get(attr.key)
+        if model_key is None:
+            continue
 
-    # Convert timestamps
-    start_time = None
-    end_time = None
-    start_nano = span.get("start_time_unix_nano")
-    end_nano = span.get("end_time_unix_nano")
+        value = extract_attribute_value(attr)
+        converter = _FIELD_CONVERTERS.get(model_key)
+        if converter is not None:
+            value = converter(value)
 
-    if start_nano:
-        try:
-            start_time = convert_nano_to_datetime(int(start_nano))
-        except (ValueError, TypeError):
-            pass
+        result[model_key] = value
 
-    if end_nano:
-        try:
-            end_time = convert_nano_to_datetime(int(end_nano))
-        except (ValueError, TypeError):
-            pass
+    return result
 
-    # Parse attributes and extract gen_ai fields
-    span_attributes = span.get("attributes", [])
-    parsed_attrs = parse_attributes(span_attributes)
-    gen_ai_fields = extract_gen_ai_fields(parsed_attrs)
 
-    # Build span data dict
-    return {
-        "span_id": span_id,
+def _hex_id(id_bytes: bytes) -> str | None:
+    return id_bytes.hex() or None
+
+
+def _hex_ids(ids: list[bytes], size: int) -> list[str]:
+    """Hex-encode fixed-size ids with a single bytes.hex() call."""
+    if not all(len(id_bytes) == size for id_bytes in ids):
+        # Missing or malformed ids; encode them one by one. A missing id
+        # becomes "" since Span.otel_span_id is not nullable.
+        return [id_bytes.hex() for id_bytes in ids]
+
+    hex_ids = b"".join(ids).hex()
+    step = 2 * size
+    return [hex_ids[i : i + step] for i in range(0, len(hex_ids), step)]
+
+
+def _process_span(span, span_id: str) -> dict:
+    """
+    Process a single OTLP Span message.
+
+    Returns a dict with span data ready for Span model creation: keys are
+    Span field names, so it can be passed as `Span(trace=trace, **span_data)`.
+    """
+    # Extract basic span fields
+    name = span.name
+
+    # Convert timestamps (protobuf fixed64 fields are already ints; 0 = unset)
+    start_nano = span.start_time_unix_nano
+    end_nano = span.end_time_unix_nano
+    start_time = convert_nano_to_datetime(start_nano) if start_nano else None
+    end_time = convert_nano_to_datetime(end_nano) if end_nano else None
+
+    # Build span data dict and add gen_ai fields to it in place
+    span_data = {
+        "otel_span_id": span_id,
         "name": name,
         "start_time": start_time,
         "end_time": end_time,
-        **gen_ai_fields,  # Merge gen_ai fields
     }
+    return extract_gen_ai_fields(span.attributes, span_data)
 
 
-def extract_trace_data(traces_dict: dict) -> dict | None:
+def extract_trace_data(traces_data) -> dict | None:
     """
-    Extract trace_id and span data from protobuf dict structure.
+    Extract trace_id and span data from a parsed OTLP TracesData message.
 
     Returns dict with:
     - trace_id: hex string (32 chars)
     - resource_attributes: parsed resource attributes
     - spans: list of span data dicts ready for Span model creation
     """
-    resource_spans = traces_dict.get("resource_spans", [])
+    resource_spans = traces_data.resource_spans
 
     if not resource_spans:
         return None
 
-    all_spans = []
+    # Only the last resource that carries attributes is kept, so find it
+    # first and parse its attributes once
     resource_attributes = {}
-    trace_id = None
-
-    # Navigate through resource_spans -> scope_spans -> spans
-    for resource_span in resource_spans:
-        # Extract resource attributes for metadata
-        resource = resource_span.get("resource", {})
-        resource_attrs = resource.get("attributes", [])
+    for resource_span in reversed(resource_spans):
+        resource_attrs = resource_span.resource.attributes
         if resource_attrs:
             resource_attributes = parse_attributes(resource_attrs)
+            break
+
+    # Flatten resource_spans -> scope_spans -> spans
+    spans = list(
+        chain.from_iterable(
+            scope_span.spans
+            for resource_span in resource_spans
+            for scope_span in resource_span.scope_spans
+        )
+    )
+    if not spans:
+        return None
 
-        # Get scope_spans
-        scope_spans = resource_span.get("scope_spans", [])
-        for scope_span in scope_spans:
-            spans = scope_span.get("spans", [])
-
-            for span in spans:
-                # Extract trace_id from first span (all spans share same trace_id)
-                if trace_id is None:
-                    trace_id = _decode_base64_id(span.get("trace_id"))
-
-                # Process span into span_data dict
-                span_data = _process_span(span)
-                all_spans.append(span_data)
-
+    # Extract trace_id from first span (all spans share same trace_id)
+    trace_id = None
+    for span in spans:
+        trace_id = _hex_id(span.trace_id)
+        if trace_id is not None:
+            break
     if trace_id is None:
         return None
 
+    # OTLP span ids are 8 bytes
+    span_ids = _hex_ids([span.span_id for span in spans], 8)
+    all_spans = [_process_span(span, span_id) for span, span_id in zip(spans, span_ids)]
+
     return {
         "trace_id": trace_id,
         "resource_attributes": resource_attributes,